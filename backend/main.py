@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -11,6 +11,7 @@ import re
 import bcrypt
 import jwt
 from supabase import create_client, Client
+from rate_limit import RateLimiter, RateLimitExceeded, RouteLimits, client_ip
 
 app = FastAPI(
     title="Fashion Designer Agent API",
@@ -38,6 +39,55 @@ supabase: Client = None
 if SUPABASE_URL and SUPABASE_KEY:
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Rate limiting for auth endpoints, applied before any Supabase/bcrypt work.
+# The auth handlers are plain `def` so they run in the threadpool; this keeps
+# the event loop free to admit (or shed) new requests while others block on
+# Supabase. AUTH_MAX_CONCURRENT is shared by all auth routes and kept below
+# the threadpool size (40) so auth traffic cannot starve the other routes.
+AUTH_RATE_LIMITS = {
+    "/api/auth/login": RouteLimits(ip_rate=0.5, ip_burst=10, email_rate=0.1, email_burst=5),
+    "/api/auth/signup": RouteLimits(ip_rate=0.1, ip_burst=5, email_rate=0.05, email_burst=3),
+    "/api/auth/validate-email": RouteLimits(ip_rate=2.0, ip_burst=20, email_rate=1.0, email_burst=10),
+}
+AUTH_MAX_CONCURRENT = int(os.getenv("AUTH_MAX_CONCURRENT", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Number of proxies in front of the app that append to X-Forwarded-For
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+rate_limiter = RateLimiter(AUTH_RATE_LIMITS, max_concurrent=AUTH_MAX_CONCURRENT, max_keys=RATE_LIMIT_MAX_KEYS)
+
+def _rate_limit_error(e: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+def auth_rate_limit(route: str):
+    """Dependency that sheds load and applies the per-IP limit for a route"""
+    async def dependency(request: Request):
+        ip = client_ip(
+            request.client.host if request.client else None,
+            request.headers.get("x-forwarded-for"),
+            TRUSTED_PROXY_HOPS,
+        )
+        try:
+            rate_limiter.acquire(route, ip)
+        except RateLimitExceeded as e:
+            raise _rate_limit_error(e)
+        try:
+            yield
+        finally:
+            rate_limiter.release()
+    return dependency
+
+def enforce_email_limit(route: str, email: str):
+    """Apply the per-email limit for a route"""
+    try:
+        rate_limiter.check_email(route, email)
+    except RateLimitExceeded as e:
+        raise _rate_limit_error(e)
+
 # Security
 security = HTTPBearer()
 
@@ -261,9 +311,10 @@ async def get_platform_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
 
-@app.post("/api/auth/signup", response_model=TokenResponse)
-async def signup(user_data: UserSignUp):
+@app.post("/api/auth/signup", response_model=TokenResponse, dependencies=[Depends(auth_rate_limit("/api/auth/signup"))])
+def signup(user_data: UserSignUp):
     """Register a new user"""
+    enforce_email_limit("/api/auth/signup", user_data.email)
     try:
         if not supabase:
             # Mock response for development without Supabase
@@ -328,9 +379,10 @@ async def signup(user_data: UserSignUp):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
-@app.post("/api/auth/validate-email", response_model=EmailValidationResponse)
-async def validate_email(data: EmailValidationRequest):
+@app.post("/api/auth/validate-email", response_model=EmailValidationResponse, dependencies=[Depends(auth_rate_limit("/api/auth/validate-email"))])
+def validate_email(data: EmailValidationRequest):
     """Check if an email is available for registration"""
+    enforce_email_limit("/api/auth/validate-email", data.email)
     try:
         if not supabase:
             # Mock response for development without Supabase
@@ -347,9 +399,10 @@ class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
-@app.post("/api/auth/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest):
+@app.post("/api/auth/login", response_model=TokenResponse, dependencies=[Depends(auth_rate_limit("/api/auth/login"))])
+def login(login_data: LoginRequest):
     """Authenticate a user and return a token"""
+    enforce_email_limit("/api/auth/login", login_data.email)
     try:
         if not supabase:
             # Mock response for development without Supabase
@@ -411,9 +464,10 @@ async def login(login_data: LoginRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during login: {str(e)}")
 
-@app.post("/api/auth/login", response_model=TokenResponse)
-async def login(user_data: UserLogin):
+@app.post("/api/auth/login", response_model=TokenResponse, dependencies=[Depends(auth_rate_limit("/api/auth/login"))])
+def login(user_data: UserLogin):
     """Authenticate a user and return a token"""
+    enforce_email_limit("/api/auth/login", user_data.email)
     try:
         # For development without Supabase
         if not supabase:
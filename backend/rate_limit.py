@@ -0,0 +1,189 @@
+"""In-process rate limiting and load shedding for the auth endpoints.
+
+Token buckets are kept per key (client IP, email) in a bounded LRU map so a
+flood of distinct keys can never grow memory past ``max_keys``. Every
+operation is O(1). Nothing here depends on FastAPI; ``main.py`` turns the
+decisions into 429/503 responses.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Optional
+import math
+import time
+
+
+@dataclass(frozen=True)
+class RouteLimits:
+    """Limits for a single route.
+
+    ``*_rate`` is tokens refilled per second, ``*_burst`` the bucket size.
+    A rate of 0 disables that bucket.
+    """
+    ip_rate: float = 1.0
+    ip_burst: int = 10
+    email_rate: float = 0.2
+    email_burst: int = 5
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request should be rejected.
+
+    ``status_code`` is 429 for an exhausted bucket and 503 when shedding
+    load; ``retry_after`` is in whole seconds.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _retry_after(wait: float) -> int:
+    return 3600 if math.isinf(wait) else max(1, math.ceil(wait))
+
+
+def _busy(wait: float) -> RateLimitExceeded:
+    return RateLimitExceeded(503, "Server is busy, please try again shortly", _retry_after(wait))
+
+
+class TokenBucketStore:
+    """Token buckets keyed by string, evicting the least recently used key.
+
+    Only a bucket that has fully refilled is evicted, since dropping it loses
+    nothing. If the store is full and the oldest bucket is still in debt, a
+    new key is refused with a 503 instead, so cycling through more than
+    ``max_keys`` keys cannot reset drained buckets.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refilled(self, bucket: list, now: float) -> float:
+        return min(self.burst, bucket[0] + max(0.0, now - bucket[1]) * self.rate)
+
+    def consume(self, key: str) -> float:
+        """Take one token for ``key``.
+
+        Returns 0 if the request is allowed, otherwise the number of seconds
+        until a token will be available. Raises RateLimitExceeded (503) if
+        ``key`` is new and no bucket can be evicted.
+        """
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    oldest = next(iter(self._buckets.values()))
+                    tokens = self._refilled(oldest, now)
+                    if tokens < self.burst:
+                        raise _busy((self.burst - tokens) / self.rate if self.rate > 0 else math.inf)
+                    self._buckets.popitem(last=False)
+                self._buckets[key] = [self.burst - 1.0, now]
+                return 0.0
+
+            self._buckets.move_to_end(key)
+            tokens = self._refilled(bucket, now)
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                return 0.0
+            bucket[0] = tokens
+            if self.rate <= 0:
+                return math.inf
+            return (1.0 - tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """Counts in-flight requests and refuses new ones above ``limit``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            if self.in_flight > 0:
+                self.in_flight -= 1
+
+
+class RateLimiter:
+    """Per-route IP/email token buckets plus one concurrency cap shared by
+    every limited route."""
+
+    def __init__(self, limits: Dict[str, RouteLimits], max_concurrent: int = 32,
+                 max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.limits = dict(limits)
+        self.concurrency = ConcurrencyLimiter(max_concurrent)
+        self._ip: Dict[str, Optional[TokenBucketStore]] = {}
+        self._email: Dict[str, Optional[TokenBucketStore]] = {}
+        for route, cfg in self.limits.items():
+            self._ip[route] = (TokenBucketStore(cfg.ip_rate, cfg.ip_burst, max_keys, clock)
+                               if cfg.ip_rate > 0 else None)
+            self._email[route] = (TokenBucketStore(cfg.email_rate, cfg.email_burst, max_keys, clock)
+                                  if cfg.email_rate > 0 else None)
+
+    def acquire(self, route: str, ip: str) -> None:
+        """Admit a request to ``route`` from ``ip`` or raise RateLimitExceeded.
+
+        On success the caller must call ``release()`` when done.
+        """
+        if not self.concurrency.try_acquire():
+            raise _busy(1)
+        try:
+            self._consume(self._ip[route], ip)
+        except RateLimitExceeded:
+            self.concurrency.release()
+            raise
+
+    def release(self) -> None:
+        self.concurrency.release()
+
+    def check_email(self, route: str, email: str) -> None:
+        """Charge the per-email bucket for ``route``."""
+        self._consume(self._email[route], email.strip().lower())
+
+    @staticmethod
+    def _consume(store: Optional[TokenBucketStore], key: str) -> None:
+        if store is None:
+            return
+        wait = store.consume(key)
+        if wait:
+            raise RateLimitExceeded(429, "Too many requests, please try again later", _retry_after(wait))
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str], trusted_hops: int) -> str:
+    """Return the client address for rate limiting.
+
+    With ``trusted_hops`` proxies in front of the app, each appends the
+    address it saw to ``X-Forwarded-For``, so the client is the entry
+    ``trusted_hops`` from the right. Anything further left is set by the
+    client and is ignored.
+    """
+    if trusted_hops > 0 and forwarded_for:
+        hops = [h.strip() for h in forwarded_for.split(",") if h.strip()]
+        if hops:
+            return hops[-min(trusted_hops, len(hops))]
+    return peer or "unknown"
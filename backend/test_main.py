@@ -1,7 +1,12 @@
+import asyncio
+import time
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+import main
 from main import app
+from rate_limit import RateLimiter, RouteLimits
 
 client = TestClient(app)
 
@@ -129,4 +134,115 @@ class TestAPI:
         """Test the root endpoint"""
         response = client.get("/")
         assert response.status_code == 200
-        assert "Fashion Designer Agent API" in response.json()["message"]
\ No newline at end of file
+        assert "Fashion Designer Agent API" in response.json()["message"]
+
+
+AUTH_REQUESTS = {
+    "/api/auth/login": lambda email: {"email": email, "password": "Password123"},
+    "/api/auth/signup": lambda email: {
+        "email": email,
+        "password": "Password123",
+        "confirm_password": "Password123",
+        "role": "designer",
+    },
+    "/api/auth/validate-email": lambda email: {"email": email},
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter(monkeypatch):
+    """Give every test a fresh limiter so bucket state does not leak between tests"""
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(main.AUTH_RATE_LIMITS))
+
+
+def use_limiter(monkeypatch, max_concurrent=32, **limits):
+    limiter = RateLimiter({route: RouteLimits(**limits) for route in AUTH_REQUESTS},
+                          max_concurrent=max_concurrent)
+    monkeypatch.setattr(main, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.mark.parametrize("route", list(AUTH_REQUESTS))
+class TestAuthRateLimiting:
+    def test_ip_limit_returns_429(self, route, monkeypatch):
+        """Test that the per-IP limit returns 429 with Retry-After"""
+        use_limiter(monkeypatch, ip_rate=0.1, ip_burst=1, email_rate=0)
+        with patch('main.supabase', None):
+            assert client.post(route, json=AUTH_REQUESTS[route]("a@example.com")).status_code == 200
+            response = client.post(route, json=AUTH_REQUESTS[route]("b@example.com"))
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "10"
+
+    def test_rejected_request_does_not_call_supabase(self, route, monkeypatch):
+        """Test that a rate-limited request is rejected before any Supabase call"""
+        use_limiter(monkeypatch, ip_rate=0.1, ip_burst=1, email_rate=0)
+        with patch('main.supabase') as mock_supabase:
+            client.post(route, json=AUTH_REQUESTS[route]("a@example.com"))
+            mock_supabase.reset_mock()
+            response = client.post(route, json=AUTH_REQUESTS[route]("b@example.com"))
+        assert response.status_code == 429
+        assert mock_supabase.mock_calls == []
+
+    def test_email_limit_returns_429(self, route, monkeypatch):
+        """Test that the per-email limit applies across client IPs"""
+        use_limiter(monkeypatch, ip_rate=0, email_rate=0.5, email_burst=1)
+        monkeypatch.setattr(main, "TRUSTED_PROXY_HOPS", 1)
+        with patch('main.supabase') as mock_supabase:
+            mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+            client.post(route, json=AUTH_REQUESTS[route]("user@example.com"),
+                        headers={"X-Forwarded-For": "1.1.1.1"})
+            mock_supabase.reset_mock()
+            response = client.post(route, json=AUTH_REQUESTS[route]("User@Example.com"),
+                                   headers={"X-Forwarded-For": "2.2.2.2"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+        assert mock_supabase.mock_calls == []
+
+    def test_trusted_forwarded_for_separates_clients(self, route, monkeypatch):
+        """Test that per-IP buckets use the address appended by the trusted proxy"""
+        use_limiter(monkeypatch, ip_rate=0.1, ip_burst=1, email_rate=0)
+        monkeypatch.setattr(main, "TRUSTED_PROXY_HOPS", 1)
+        with patch('main.supabase', None):
+            for ip in ("1.1.1.1", "2.2.2.2"):
+                response = client.post(route, json=AUTH_REQUESTS[route]("a@example.com"),
+                                       headers={"X-Forwarded-For": ip})
+                assert response.status_code == 200
+            response = client.post(route, json=AUTH_REQUESTS[route]("a@example.com"),
+                                   headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"})
+        assert response.status_code == 429
+
+    def test_validation_error_releases_slot(self, route, monkeypatch):
+        """Test that a 422 response does not leak a concurrency slot"""
+        limiter = use_limiter(monkeypatch, max_concurrent=1, ip_rate=0, email_rate=0)
+        with patch('main.supabase', None):
+            assert client.post(route, json={"email": "not-an-email"}).status_code == 422
+            assert limiter.concurrency.in_flight == 0
+            assert client.post(route, json=AUTH_REQUESTS[route]("a@example.com")).status_code == 200
+
+    def test_sheds_load_with_503(self, route, monkeypatch):
+        """Test that requests beyond the global concurrency cap get a 503.
+
+        The requests share one event loop, as they do under uvicorn, so a
+        handler that blocked the loop would never let a second one be counted.
+        """
+        limiter = use_limiter(monkeypatch, max_concurrent=1, ip_rate=0, email_rate=0)
+
+        def slow_execute():
+            time.sleep(0.2)
+            return MagicMock(data=[])
+
+        async def send_concurrently():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                return await asyncio.gather(*[
+                    async_client.post(route, json=AUTH_REQUESTS[route](f"user{i}@example.com"))
+                    for i in range(3)
+                ])
+
+        with patch('main.supabase') as mock_supabase:
+            mock_supabase.table.return_value.select.return_value.eq.return_value.execute.side_effect = slow_execute
+            responses = asyncio.run(send_concurrently())
+        shed = [r for r in responses if r.status_code == 503]
+        assert len(shed) == 2
+        assert all(r.headers["retry-after"] == "1" for r in shed)
+        assert limiter.concurrency.in_flight == 0
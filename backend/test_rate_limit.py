@@ -0,0 +1,157 @@
+import pytest
+from rate_limit import (
+    ConcurrencyLimiter,
+    RateLimiter,
+    RateLimitExceeded,
+    RouteLimits,
+    TokenBucketStore,
+    client_ip,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucketStore:
+    def test_allows_burst_then_rejects(self):
+        """Test that a bucket allows `burst` requests and then reports a wait"""
+        clock = FakeClock()
+        store = TokenBucketStore(rate=1.0, burst=3, clock=clock)
+        assert [store.consume("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert store.consume("a") == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        """Test that tokens are refilled at `rate` per second"""
+        clock = FakeClock()
+        store = TokenBucketStore(rate=2.0, burst=1, clock=clock)
+        assert store.consume("a") == 0.0
+        assert store.consume("a") == pytest.approx(0.5)
+        clock.now += 0.5
+        assert store.consume("a") == 0.0
+
+    def test_keys_are_independent(self):
+        """Test that exhausting one key does not affect another"""
+        store = TokenBucketStore(rate=1.0, burst=1, clock=FakeClock())
+        assert store.consume("a") == 0.0
+        assert store.consume("a") > 0
+        assert store.consume("b") == 0.0
+
+    def test_evicts_least_recently_used(self):
+        """Test that the store never holds more than max_keys buckets"""
+        clock = FakeClock()
+        store = TokenBucketStore(rate=1.0, burst=1, max_keys=2, clock=clock)
+        store.consume("a")
+        store.consume("b")
+        clock.now += 1.0
+        store.consume("a")
+        store.consume("c")
+        assert len(store) == 2
+        # "b" had refilled and was evicted, so it starts with a full bucket again
+        clock.now += 1.0
+        assert store.consume("b") == 0.0
+        assert "a" not in store._buckets
+
+    def test_refuses_new_key_while_oldest_in_debt(self):
+        """Test that a drained bucket cannot be reset by flooding new keys"""
+        clock = FakeClock()
+        store = TokenBucketStore(rate=0.5, burst=1, max_keys=2, clock=clock)
+        store.consume("a")
+        store.consume("b")
+        with pytest.raises(RateLimitExceeded) as exc:
+            store.consume("c")
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after == 2
+        assert store.consume("a") > 0
+        clock.now += 2.0
+        assert store.consume("c") == 0.0
+
+    def test_clock_going_backwards_does_not_remove_tokens(self):
+        """Test that a stale timestamp is treated as no elapsed time"""
+        clock = FakeClock()
+        store = TokenBucketStore(rate=1.0, burst=2, clock=clock)
+        clock.now = 10.0
+        store.consume("a")
+        clock.now = 9.0
+        assert store.consume("a") == 0.0
+
+
+class TestConcurrencyLimiter:
+    def test_limit_and_release(self):
+        """Test that acquisitions beyond the limit fail until a slot is released"""
+        limiter = ConcurrencyLimiter(2)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        limiter.release()
+        assert limiter.try_acquire()
+
+
+class TestRateLimiter:
+    def make_limiter(self, max_concurrent=32, **kwargs):
+        limits = RouteLimits(**kwargs)
+        return RateLimiter({"/login": limits, "/signup": limits},
+                           max_concurrent=max_concurrent, clock=FakeClock())
+
+    def test_ip_limit_returns_429(self):
+        """Test that the per-IP bucket rejects with 429 and a Retry-After"""
+        limiter = self.make_limiter(ip_rate=0.5, ip_burst=1)
+        limiter.acquire("/login", "1.2.3.4")
+        limiter.release()
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.acquire("/login", "1.2.3.4")
+        assert exc.value.status_code == 429
+        assert exc.value.retry_after == 2
+
+    def test_rejected_ip_releases_slot(self):
+        """Test that a 429 does not leak a concurrency slot"""
+        limiter = self.make_limiter(ip_rate=1.0, ip_burst=1, max_concurrent=1)
+        limiter.acquire("/login", "1.2.3.4")
+        limiter.release()
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire("/login", "1.2.3.4")
+        limiter.acquire("/login", "5.6.7.8")
+
+    def test_sheds_load_with_503(self):
+        """Test that requests over max_concurrent are shed with 503 across routes"""
+        limiter = self.make_limiter(max_concurrent=1)
+        limiter.acquire("/login", "1.2.3.4")
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.acquire("/signup", "5.6.7.8")
+        assert exc.value.status_code == 503
+        limiter.release()
+        limiter.acquire("/signup", "5.6.7.8")
+
+    def test_email_limit_is_case_insensitive(self):
+        """Test that the per-email bucket normalises the address"""
+        limiter = self.make_limiter(email_rate=0.1, email_burst=1)
+        limiter.check_email("/login", "User@Example.com")
+        with pytest.raises(RateLimitExceeded) as exc:
+            limiter.check_email("/login", "user@example.com ")
+        assert exc.value.status_code == 429
+
+    def test_zero_rate_disables_bucket(self):
+        """Test that a rate of 0 turns the bucket off"""
+        limiter = self.make_limiter(email_rate=0, email_burst=1)
+        for _ in range(5):
+            limiter.check_email("/login", "user@example.com")
+
+
+class TestClientIp:
+    def test_uses_peer_without_trusted_proxies(self):
+        """Test that X-Forwarded-For is ignored when no proxy is trusted"""
+        assert client_ip("10.0.0.1", "1.2.3.4", 0) == "10.0.0.1"
+
+    def test_uses_hop_appended_by_trusted_proxy(self):
+        """Test that client-supplied X-Forwarded-For entries are ignored"""
+        assert client_ip("10.0.0.1", "6.6.6.6, 1.2.3.4", 1) == "1.2.3.4"
+        assert client_ip("10.0.0.1", "6.6.6.6, 1.2.3.4, 10.0.0.2", 2) == "1.2.3.4"
+
+    def test_falls_back_to_peer_without_header(self):
+        """Test that the peer address is used when the header is missing"""
+        assert client_ip("10.0.0.1", None, 1) == "10.0.0.1"
+        assert client_ip(None, None, 0) == "unknown"